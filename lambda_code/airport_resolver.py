@@ -1,13 +1,52 @@
-import json
+import orjson
+import logging
 import os
 import boto3
+import numpy as np
+import re
 import requests
-from math import radians, cos, sin, asin, sqrt
+import time
+from concurrent.futures import ThreadPoolExecutor
+from math import radians
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# sklearn is too heavy to bundle (it would blow the Lambda package size
+# limits), so BallTree is only used if a layer provides it; the NumPy
+# scan below handles the ~4.5k airports fine without it
+try:
+    from sklearn.neighbors import BallTree
+except ImportError:
+    BallTree = None
+
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+
+def _dumps(obj):
+    """Serialize with orjson, decoded to str (drop-in for json.dumps)"""
+    return orjson.dumps(obj, default=float).decode()
+
 
 secrets_client = boto3.client('secretsmanager')
 
+# Module-level executor so worker threads persist across warm invocations
+# instead of being spawned and torn down per request
+_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='resolver')
+
+# Shared HTTP session so repeated calls reuse pooled TCP+TLS connections
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+
 SECRETS_ARN = os.environ['SECRETS_ARN']
 
+# Parameters and Secrets Lambda Extension sidecar (local cache, ~1ms per hit)
+SECRETS_EXTENSION_URL = "http://localhost:2773/secretsmanager/get"
+
 # Nominatim API for geocoding (OpenStreetMap)
 NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
 
@@ -18,108 +57,198 @@ AMADEUS_AIRPORT_URL = "https://test.api.amadeus.com/v1/reference-data/locations/
 # Hugging Face API
 HF_API_URL = "https://router.huggingface.co/hf-inference/models/mistralai/Mixtral-8x7B-Instruct-v0.1"
 
+# Extracts the JSON object from LLM responses that wrap it in extra text
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Per-container caches: secrets never change during a deployment and
+# Amadeus tokens are valid ~30 minutes, so reuse them across warm invocations
+_SECRETS_CACHE = None
+_AMADEUS_TOKEN = {'token': None, 'expires_at': 0}
+
 # Load local airport dataset
 AIRPORTS_DATA = None
 
+# Structure-of-arrays view of the airport dataset for vectorized scans
+_LAT = None
+_LON = None
+_COS_LAT = None
+_IATA = None
+_NAME = None
+_CITY = None
+_COUNTRY = None
+
+# BallTree index over airport coordinates (built once per container)
+_TREE = None
+
 def load_airports_data():
     """Load local airports dataset (cached in memory)"""
     global AIRPORTS_DATA
     if AIRPORTS_DATA is None:
         airports_file = os.path.join(os.path.dirname(__file__), 'airports_data.json')
-        with open(airports_file, 'r') as f:
-            AIRPORTS_DATA = json.load(f)
-        print(f"Loaded {len(AIRPORTS_DATA)} airports from local dataset")
+        with open(airports_file, 'rb') as f:
+            AIRPORTS_DATA = orjson.loads(f.read())
+        logger.info(f"Loaded {len(AIRPORTS_DATA)} airports from local dataset")
     return AIRPORTS_DATA
 
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """
-    Calculate the great circle distance between two points
-    on the earth (specified in decimal degrees)
-    Returns distance in kilometers
-    """
-    # Convert to radians
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-
-    # Radius of earth in kilometers
-    r = 6371
-    return c * r
-
-
-def find_nearest_airport_local(latitude, longitude, expected_country_code=None, max_distance_km=500, return_alternatives=False):
+def build_airport_arrays():
+    """Build NumPy column arrays over the airport dataset (cached in memory)"""
+    global _LAT, _LON, _COS_LAT, _IATA, _NAME, _CITY, _COUNTRY, _TREE
+    if _LAT is None:
+        npz_file = os.path.join(os.path.dirname(__file__), 'airports.npz')
+        if os.path.exists(npz_file):
+            # Pre-parsed arrays written by build_airports_npz.py at packaging
+            # time: raw array reads, no JSON parse, no per-airport dicts
+            data = np.load(npz_file)
+            lat_deg = data['lat']
+            lon_deg = data['lon']
+            _IATA = data['iata'].astype(object)
+            _NAME = data['name'].astype(object)
+            _CITY = data['city'].astype(object)
+            _COUNTRY = data['country'].astype(object)
+            logger.info(f"Loaded {lat_deg.shape[0]} airports from pre-built arrays")
+        else:
+            # Fallback for environments without the packaged npz file
+            airports = load_airports_data()
+            lat_deg = np.array([a['lat'] for a in airports], dtype=np.float32)
+            lon_deg = np.array([a['lon'] for a in airports], dtype=np.float32)
+            _IATA = np.array([a['iata'] for a in airports], dtype=object)
+            _NAME = np.array([a['name'] for a in airports], dtype=object)
+            _CITY = np.array([a['city'] for a in airports], dtype=object)
+            _COUNTRY = np.array([a['country'] for a in airports], dtype=object)
+
+        # float32 (~1m precision) is plenty for airport distances and halves
+        # the memory traffic of the vectorized scan
+        _LAT = np.radians(lat_deg)
+        _LON = np.radians(lon_deg)
+        _COS_LAT = np.cos(_LAT)
+        if BallTree is not None:
+            _TREE = BallTree(np.c_[_LAT, _LON], metric='haversine')
+            logger.info("Built BallTree index over airport coordinates")
+
+
+# Build the index during the Lambda init phase so it is shared across all
+# warm invocations of the container; on failure the lazy build inside
+# find_nearest_airport_local still applies
+try:
+    build_airport_arrays()
+except Exception as e:
+    logger.error(f"Deferred airport index build to first invocation: {str(e)}")
+
+
+def find_nearest_airport_local(latitude, longitude, expected_country_code=None, max_distance_km=500):
     """
-    Find nearest airport from local dataset
-    Returns airport data with IATA code, name, and coordinates
-    If return_alternatives=True, returns list of top 5 nearest airports
+    Find nearest airports from local dataset using a vectorized haversine scan
+    Returns the top 5 airports by weighted distance, nearest first,
+    each with IATA code, name, and coordinates
     """
     try:
-        airports = load_airports_data()
-
-        candidates = []
+        build_airport_arrays()
 
-        for airport in airports:
-            distance = haversine_distance(latitude, longitude, airport['lat'], airport['lon'])
+        lat_r = np.float32(radians(latitude))
+        lon_r = np.float32(radians(longitude))
 
-            # Apply filters
-            if distance > max_distance_km:
-                continue
+        if _TREE is not None:
+            # O(log N) k-NN query; 20 candidates is plenty under the distance cutoff
+            dist, idx = _TREE.query([[lat_r, lon_r]], k=min(20, _LAT.shape[0]))
+            cand_dist = dist[0] * 6371.0
+            cand_idx = idx[0]
+        else:
+            # Fallback: cheap equirectangular approximation over the whole
+            # dataset as a coarse filter (2 multiplies + sqrt per airport,
+            # accurate to a few percent at this scale), with a 20% margin.
+            # Wrap the longitude delta into [-pi, pi] so airports across
+            # the antimeridian aren't filtered out as ~2*pi away
+            dlon = np.mod(_LON - lon_r + np.pi, 2.0 * np.pi) - np.pi
+            x = dlon * np.cos(lat_r)
+            y = _LAT - lat_r
+            approx = 6371.0 * np.sqrt(x * x + y * y)
+            cand_idx = np.nonzero(approx <= max_distance_km * 1.2)[0]
+
+            # Exact haversine only on the survivors
+            dlat = _LAT[cand_idx] - lat_r
+            dlon = _LON[cand_idx] - lon_r
+            a = np.sin(dlat * 0.5) ** 2 + np.cos(lat_r) * _COS_LAT[cand_idx] * np.sin(dlon * 0.5) ** 2
+            cand_dist = 2.0 * 6371.0 * np.arcsin(np.sqrt(a))
+
+        # Keep only airports within range
+        in_range = cand_dist <= max_distance_km
+        cand_idx = cand_idx[in_range]
+        cand_dist = cand_dist[in_range]
+
+        if cand_idx.size == 0:
+            logger.info(f"No airports found in local dataset within {max_distance_km}km")
+            return []
+
+        # Prefer airports in same country: branchless weighted distance
+        # (penalize wrong country by 2x) via a vectorized compare+select
+        if expected_country_code:
+            weighted = cand_dist * np.where(_COUNTRY[cand_idx] == expected_country_code, 1.0, 2.0)
+        else:
+            weighted = cand_dist
 
-            # Prefer airports in same country
-            country_match = not expected_country_code or airport['country'] == expected_country_code
+        # Select the top 5 by weighted distance before building any dicts
+        if weighted.size > 5:
+            top = np.argpartition(weighted, 5)[:5]
+        else:
+            top = np.arange(weighted.size)
+        top = top[np.argsort(weighted[top])]
 
-            # Use weighted distance (penalize wrong country by 2x)
-            weighted_distance = distance if country_match else distance * 2
+        candidates = []
 
+        for i in top:
+            idx = cand_idx[i]
             candidates.append({
-                'airport_code': airport['iata'],
-                'airport_name': airport['name'],
-                'latitude': airport['lat'],
-                'longitude': airport['lon'],
-                'city_name': airport['city'],
-                'country_code': airport['country'],
-                'distance_km': distance,
-                'weighted_distance': weighted_distance
+                'airport_code': _IATA[idx],
+                'airport_name': _NAME[idx],
+                'latitude': float(np.degrees(_LAT[idx])),
+                'longitude': float(np.degrees(_LON[idx])),
+                'city_name': _CITY[idx],
+                'country_code': _COUNTRY[idx],
+                'distance_km': float(cand_dist[i]),
+                'weighted_distance': float(weighted[i])
             })
 
-        if not candidates:
-            print(f"No airports found in local dataset within {max_distance_km}km")
-            return [] if return_alternatives else None
-
-        # Sort by weighted distance
-        candidates.sort(key=lambda x: x['weighted_distance'])
-
-        if return_alternatives:
-            # Return top 5
-            top_airports = candidates[:5]
-            print(f"Local dataset found {len(top_airports)} alternative airports")
-            for i, apt in enumerate(top_airports):
-                print(f"  {i+1}. {apt['airport_code']} - {apt['airport_name']} ({apt['distance_km']:.1f}km)")
-            return top_airports
-        else:
-            # Return only the nearest
-            nearest = candidates[0]
-            print(f"Local dataset found: {nearest['airport_code']} - {nearest['airport_name']} ({nearest['distance_km']:.1f}km)")
-            return nearest
+        logger.info(f"Local dataset found {len(candidates)} airports")
+        for i, apt in enumerate(candidates):
+            logger.info(f"  {i+1}. {apt['airport_code']} - {apt['airport_name']} ({apt['distance_km']:.1f}km)")
+        return candidates
 
     except Exception as e:
-        print(f"Error searching local dataset: {str(e)}")
-        return [] if return_alternatives else None
+        logger.error(f"Error searching local dataset: {str(e)}")
+        return []
 
 
 def get_api_keys():
-    """Retrieve API keys from Secrets Manager"""
+    """Retrieve API keys via the Secrets extension sidecar (cached per container)"""
+    global _SECRETS_CACHE
+    if _SECRETS_CACHE is not None:
+        return _SECRETS_CACHE
+
+    secret_string = None
     try:
-        response = secrets_client.get_secret_value(SecretId=SECRETS_ARN)
-        return json.loads(response['SecretString'])
+        # The extension caches secrets in a local sidecar, so this is a
+        # loopback HTTP GET instead of a Secrets Manager API round-trip
+        response = _SESSION.get(
+            SECRETS_EXTENSION_URL,
+            params={'secretId': SECRETS_ARN},
+            headers={'X-Aws-Parameters-Secrets-Token': os.environ.get('AWS_SESSION_TOKEN', '')},
+            timeout=2
+        )
+        response.raise_for_status()
+        secret_string = orjson.loads(response.content)['SecretString']
     except Exception as e:
-        print(f"Error retrieving secrets: {str(e)}")
-        return None
+        logger.warning(f"Secrets extension unavailable ({str(e)}), falling back to API call")
+
+    if secret_string is None:
+        try:
+            secret_string = secrets_client.get_secret_value(SecretId=SECRETS_ARN)['SecretString']
+        except Exception as e:
+            logger.error(f"Error retrieving secrets: {str(e)}")
+            return None
+
+    _SECRETS_CACHE = orjson.loads(secret_string)
+    return _SECRETS_CACHE
 
 
 def geocode_city(city, country):
@@ -138,11 +267,11 @@ def geocode_city(city, country):
             "limit": 1
         }
 
-        print(f"Geocoding: {city}, {country}")
-        response = requests.get(NOMINATIM_URL, params=params, headers=headers, timeout=10)
+        logger.info(f"Geocoding: {city}, {country}")
+        response = _SESSION.get(NOMINATIM_URL, params=params, headers=headers, timeout=10)
         response.raise_for_status()
 
-        results = response.json()
+        results = orjson.loads(response.content)
 
         if results and len(results) > 0:
             lat = float(results[0]['lat'])
@@ -152,19 +281,23 @@ def geocode_city(city, country):
             if not country_code:
                 # Fallback: extract from display_name or other fields
                 country_code = results[0].get('country_code', '').upper()
-            print(f"Geocoded coordinates: {lat}, {lon}, country: {country_code}")
+            logger.info(f"Geocoded coordinates: {lat}, {lon}, country: {country_code}")
             return (lat, lon, country_code)
         else:
-            print(f"No geocoding results for {city}, {country}")
+            logger.info(f"No geocoding results for {city}, {country}")
             return None
 
     except Exception as e:
-        print(f"Error geocoding city: {str(e)}")
+        logger.error(f"Error geocoding city: {str(e)}")
         return None
 
 
 def get_amadeus_access_token(api_key, api_secret):
-    """Get Amadeus API access token using client credentials"""
+    """Get Amadeus API access token using client credentials (cached until expiry)"""
+    # Reuse the cached token while it has at least 60s of validity left
+    if _AMADEUS_TOKEN['token'] and time.time() < _AMADEUS_TOKEN['expires_at'] - 60:
+        return _AMADEUS_TOKEN['token']
+
     try:
         headers = {
             "Content-Type": "application/x-www-form-urlencoded"
@@ -176,19 +309,24 @@ def get_amadeus_access_token(api_key, api_secret):
             "client_secret": api_secret
         }
 
-        print("Requesting Amadeus access token...")
-        response = requests.post(AMADEUS_AUTH_URL, headers=headers, data=data, timeout=30)
+        logger.info("Requesting Amadeus access token...")
+        response = _SESSION.post(AMADEUS_AUTH_URL, headers=headers, data=data, timeout=30)
         response.raise_for_status()
 
-        result = response.json()
+        result = orjson.loads(response.content)
         access_token = result.get('access_token')
-        print("Access token obtained")
+        expires_in = result.get('expires_in', 1799)  # Default 30 minutes
+
+        _AMADEUS_TOKEN['token'] = access_token
+        _AMADEUS_TOKEN['expires_at'] = time.time() + expires_in
+
+        logger.info(f"Access token obtained, expires in {expires_in} seconds")
         return access_token
 
     except Exception as e:
-        print(f"Error getting Amadeus access token: {str(e)}")
+        logger.error(f"Error getting Amadeus access token: {str(e)}")
         if hasattr(e, 'response') and e.response is not None:
-            print(f"Response content: {e.response.text}")
+            logger.error(f"Response content: {e.response.text}")
         return None
 
 
@@ -210,18 +348,18 @@ def find_nearest_airport(access_token, latitude, longitude):
             "sort": "distance"
         }
 
-        print(f"Searching nearest airport to ({latitude}, {longitude})")
-        response = requests.get(AMADEUS_AIRPORT_URL, headers=headers, params=params, timeout=30)
+        logger.info(f"Searching nearest airport to ({latitude}, {longitude})")
+        response = _SESSION.get(AMADEUS_AIRPORT_URL, headers=headers, params=params, timeout=30)
         response.raise_for_status()
 
-        result = response.json()
+        result = orjson.loads(response.content)
 
         if 'data' in result and len(result['data']) > 0:
             # Log all found airports
-            print(f"Found {len(result['data'])} airports")
+            logger.info(f"Found {len(result['data'])} airports")
             for idx, apt in enumerate(result['data']):
                 distance = apt.get('distance', {}).get('value', 0)
-                print(f"  {idx+1}. {apt['iataCode']} - {apt['name']} ({apt['address'].get('cityName')}, {apt['address'].get('countryCode')}) - {distance}km")
+                logger.info(f"  {idx+1}. {apt['iataCode']} - {apt['name']} ({apt['address'].get('cityName')}, {apt['address'].get('countryCode')}) - {distance}km")
 
             # Pick the first one (closest by distance)
             airport = result['data'][0]
@@ -237,17 +375,17 @@ def find_nearest_airport(access_token, latitude, longitude):
                 "distance_km": airport.get('distance', {}).get('value', 0)
             }
 
-            print(f"Selected airport: {airport_data['airport_code']} - {airport_data['airport_name']}")
+            logger.info(f"Selected airport: {airport_data['airport_code']} - {airport_data['airport_name']}")
             return airport_data
         else:
-            print("No airports found in response")
+            logger.info("No airports found in response")
             return None
 
     except Exception as e:
-        print(f"Error finding nearest airport: {str(e)}")
+        logger.error(f"Error finding nearest airport: {str(e)}")
         if hasattr(e, 'response') and e.response is not None:
-            print(f"Response status: {e.response.status_code}")
-            print(f"Response content: {e.response.text}")
+            logger.error(f"Response status: {e.response.status_code}")
+            logger.error(f"Response content: {e.response.text}")
         return None
 
 
@@ -285,11 +423,11 @@ Requirements:
             }
         }
 
-        print(f"Calling LLM fallback for {city}, {country}")
-        response = requests.post(HF_API_URL, headers=headers, json=payload, timeout=30)
+        logger.info(f"Calling LLM fallback for {city}, {country}")
+        response = _SESSION.post(HF_API_URL, headers=headers, json=payload, timeout=30)
         response.raise_for_status()
 
-        result = response.json()
+        result = orjson.loads(response.content)
 
         # Extract the generated text
         if isinstance(result, list) and len(result) > 0:
@@ -297,34 +435,33 @@ Requirements:
         elif isinstance(result, dict):
             generated_text = result.get('generated_text', '').strip()
         else:
-            print(f"Unexpected LLM response format: {result}")
+            logger.info(f"Unexpected LLM response format: {result}")
             return None
 
-        print(f"LLM response: {generated_text}")
+        logger.info(f"LLM response: {generated_text}")
 
         # Parse JSON from response
         # Sometimes the model adds extra text, so try to extract JSON
-        import re
-        json_match = re.search(r'\{.*\}', generated_text, re.DOTALL)
+        json_match = _JSON_RE.search(generated_text)
         if json_match:
             json_str = json_match.group(0)
-            airport_data = json.loads(json_str)
+            airport_data = orjson.loads(json_str)
 
             # Validate required fields
             if all(key in airport_data for key in ['airport_code', 'airport_name', 'latitude', 'longitude']):
-                print(f"LLM resolved: {airport_data['airport_code']} - {airport_data['airport_name']}")
+                logger.info(f"LLM resolved: {airport_data['airport_code']} - {airport_data['airport_name']}")
                 return airport_data
             else:
-                print("LLM response missing required fields")
+                logger.info("LLM response missing required fields")
                 return None
         else:
-            print("Could not extract JSON from LLM response")
+            logger.info("Could not extract JSON from LLM response")
             return None
 
     except Exception as e:
-        print(f"Error in LLM fallback: {str(e)}")
+        logger.error(f"Error in LLM fallback: {str(e)}")
         if hasattr(e, 'response') and e.response is not None:
-            print(f"Response content: {e.response.text}")
+            logger.error(f"Response content: {e.response.text}")
         return None
 
 
@@ -334,12 +471,13 @@ def handler(event, context):
     Endpoint: POST /resolve-airport
     Body: {"city": "London", "country": "England"}
     """
-    print(f"Airport resolver invoked with event: {json.dumps(event)}")
+    # Lazy %s formatting: the event is only serialized when DEBUG is enabled
+    logger.debug("Airport resolver invoked with event: %s", event)
 
     # Parse request body
     try:
         if isinstance(event.get('body'), str):
-            body = json.loads(event['body'])
+            body = orjson.loads(event['body'])
         else:
             body = event.get('body', {})
 
@@ -353,12 +491,12 @@ def handler(event, context):
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 },
-                'body': json.dumps({
+                'body': _dumps({
                     'error': 'Missing city or country'
                 })
             }
 
-        print(f"Resolving airport for: {city}, {country}")
+        logger.info(f"Resolving airport for: {city}, {country}")
 
     except Exception as e:
         return {
@@ -367,13 +505,18 @@ def handler(event, context):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
+            'body': _dumps({
                 'error': f'Invalid request: {str(e)}'
             })
         }
 
-    # Step 1: Geocode the city to get coordinates
-    coords = geocode_city(city, country)
+    # Steps 1-2: geocoding and the Secrets Manager fetch are independent,
+    # so run them concurrently and pay only for the slower of the two
+    coords_future = _EXECUTOR.submit(geocode_city, city, country)
+    secrets_future = _EXECUTOR.submit(get_api_keys)
+    coords = coords_future.result()
+    secrets = secrets_future.result()
+
     if not coords:
         return {
             'statusCode': 404,
@@ -381,15 +524,14 @@ def handler(event, context):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
+            'body': _dumps({
                 'error': f'Could not geocode {city}, {country}'
             })
         }
 
     latitude, longitude, expected_country_code = coords
 
-    # Step 2: Get Amadeus API credentials
-    secrets = get_api_keys()
+    # Validate the Amadeus API credentials fetched above
     if not secrets or 'amadeus_api_key' not in secrets or 'amadeus_api_secret' not in secrets:
         return {
             'statusCode': 500,
@@ -397,7 +539,7 @@ def handler(event, context):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
+            'body': _dumps({
                 'error': 'Failed to retrieve Amadeus API keys'
             })
         }
@@ -415,7 +557,7 @@ def handler(event, context):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
+            'body': _dumps({
                 'error': 'Failed to get Amadeus access token'
             })
         }
@@ -426,51 +568,50 @@ def handler(event, context):
     # Step 5: Validate Amadeus result - check if too far or wrong country
     use_llm_fallback = False
     if not airport_data:
-        print("Amadeus API returned no airports, trying LLM fallback...")
+        logger.info("Amadeus API returned no airports, trying LLM fallback...")
         use_llm_fallback = True
     elif airport_data.get('distance_km', 0) > 200:
-        print(f"Amadeus airport too far ({airport_data['distance_km']}km), trying LLM fallback...")
+        logger.info(f"Amadeus airport too far ({airport_data['distance_km']}km), trying LLM fallback...")
         use_llm_fallback = True
     elif expected_country_code and airport_data.get('country_code', '').upper() != expected_country_code:
-        print(f"Amadeus airport in wrong country ({airport_data.get('country_code')} vs {expected_country_code}), trying LLM fallback...")
+        logger.info(f"Amadeus airport in wrong country ({airport_data.get('country_code')} vs {expected_country_code}), trying LLM fallback...")
         use_llm_fallback = True
 
-    # Step 6: Use local dataset fallback if needed
+    # Step 6: Single local-dataset lookup serves both the fallback primary
+    # and the alternative airports (for fallback if no flights available)
+    local_airports = find_nearest_airport_local(latitude, longitude, expected_country_code, max_distance_km=500)
+
     if use_llm_fallback:
-        print("Falling back to local airport dataset...")
-        airport_data = find_nearest_airport_local(latitude, longitude, expected_country_code, max_distance_km=500)
+        logger.info("Falling back to local airport dataset...")
 
-        if not airport_data:
+        if not local_airports:
             return {
                 'statusCode': 404,
                 'headers': {
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 },
-                'body': json.dumps({
+                'body': _dumps({
                     'error': 'Could not resolve airport using Amadeus API or local dataset'
                 })
             }
 
-    # Get alternative airports from local dataset (for fallback if no flights available)
-    alternatives = []
-    try:
-        all_alternatives = find_nearest_airport_local(latitude, longitude, expected_country_code, max_distance_km=500, return_alternatives=True)
-        # Filter out the primary airport and take top 3 alternatives
-        alternatives = [
-            {
-                'airport_code': apt['airport_code'],
-                'airport_name': apt['airport_name'],
-                'distance_km': apt['distance_km'],
-                'latitude': apt['latitude'],
-                'longitude': apt['longitude']
-            }
-            for apt in all_alternatives
-            if apt['airport_code'] != airport_data['airport_code']
-        ][:3]
-        print(f"Including {len(alternatives)} alternative airports in response")
-    except Exception as e:
-        print(f"Error getting alternatives: {str(e)}")
+        airport_data = local_airports[0]
+        logger.info(f"Local dataset selected: {airport_data['airport_code']} - {airport_data['airport_name']} ({airport_data['distance_km']:.1f}km)")
+
+    # Filter out the primary airport and take top 3 alternatives
+    alternatives = [
+        {
+            'airport_code': apt['airport_code'],
+            'airport_name': apt['airport_name'],
+            'distance_km': apt['distance_km'],
+            'latitude': apt['latitude'],
+            'longitude': apt['longitude']
+        }
+        for apt in local_airports
+        if apt['airport_code'] != airport_data['airport_code']
+    ][:3]
+    logger.info(f"Including {len(alternatives)} alternative airports in response")
 
     # Return result (frontend expects this format)
     # Return CITY coordinates (for map marker) + airport code (for flights)
@@ -495,5 +636,5 @@ def handler(event, context):
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*'
         },
-        'body': json.dumps(response_body)
+        'body': _dumps(response_body)
     }
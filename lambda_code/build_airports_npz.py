@@ -0,0 +1,32 @@
+"""
+Convert airports_data.json into pre-parsed NumPy column arrays (airports.npz)
+
+Run by package_lambda.sh at packaging time. The airport resolver loads
+the arrays directly at cold start and skips parsing ~4.5k JSON objects.
+"""
+import json
+import os
+import numpy as np
+
+
+def main():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    with open(os.path.join(base_dir, 'airports_data.json'), 'r') as f:
+        airports = json.load(f)
+
+    np.savez(
+        os.path.join(base_dir, 'airports.npz'),
+        lat=np.array([a['lat'] for a in airports], dtype=np.float32),
+        lon=np.array([a['lon'] for a in airports], dtype=np.float32),
+        iata=np.array([a['iata'] for a in airports]),
+        name=np.array([a['name'] for a in airports]),
+        city=np.array([a['city'] for a in airports]),
+        country=np.array([a['country'] for a in airports])
+    )
+
+    print(f"Wrote {len(airports)} airports to airports.npz")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,36 +1,118 @@
-import json
+import asyncio
+import base64
+import gzip
+import io
+import orjson
+import logging
 import os
 import boto3
+import httpx
+import ijson
 import requests
 import time
 from datetime import datetime, timedelta
 from decimal import Decimal
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from boto3.dynamodb.conditions import Key
+from botocore.config import Config
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-dynamodb = boto3.resource('dynamodb')
-secrets_client = boto3.client('secretsmanager')
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+
+def _dumps(obj):
+    """Serialize with orjson, decoded to str (drop-in for json.dumps)"""
+    return orjson.dumps(obj, default=float).decode()
+
+
+# Larger connection pool so parallel cache reads/writes don't serialize
+# on botocore's default 10 pooled connections
+_BOTO_CONFIG = Config(max_pool_connections=50, retries={'max_attempts': 2, 'mode': 'standard'})
+
+dynamodb = boto3.resource('dynamodb', config=_BOTO_CONFIG)
+secrets_client = boto3.client('secretsmanager', config=_BOTO_CONFIG)
+
+# Shared HTTP session for the synchronous auth call
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+
+# Persistent event loop + async HTTP client reused across warm invocations;
+# HTTP/2 multiplexes the concurrent flight searches over one TLS connection
+_LOOP = asyncio.new_event_loop()
+_ASYNC_CLIENT = None
+
+
+def get_async_client():
+    """Create the shared httpx client lazily (bound to the persistent loop)"""
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is None:
+        _ASYNC_CLIENT = httpx.AsyncClient(
+            http2=True,
+            timeout=60.0,
+            limits=httpx.Limits(max_keepalive_connections=50)
+        )
+    return _ASYNC_CLIENT
 
 TRAVEL_INDEX_TABLE = os.environ['TRAVEL_INDEX_TABLE']
 SECRETS_ARN = os.environ['SECRETS_ARN']
 CACHE_TTL_HOURS = 24
 
+# Parameters and Secrets Lambda Extension sidecar (local cache, ~1ms per hit)
+SECRETS_EXTENSION_URL = "http://localhost:2773/secretsmanager/get"
+
+# Per-container caches: secrets never change during a deployment and
+# Amadeus tokens are valid ~30 minutes, so reuse them across warm invocations
+_SECRETS_CACHE = None
+_AMADEUS_TOKEN = {'token': None, 'expires_at': 0}
+
 # Amadeus API endpoints
 AMADEUS_AUTH_URL = "https://test.api.amadeus.com/v1/security/oauth2/token"
 AMADEUS_FLIGHTS_URL = "https://test.api.amadeus.com/v2/shopping/flight-offers"
 
 
 def get_api_keys():
-    """Retrieve API keys from Secrets Manager"""
+    """Retrieve API keys via the Secrets extension sidecar (cached per container)"""
+    global _SECRETS_CACHE
+    if _SECRETS_CACHE is not None:
+        return _SECRETS_CACHE
+
+    secret_string = None
     try:
-        response = secrets_client.get_secret_value(SecretId=SECRETS_ARN)
-        return json.loads(response['SecretString'])
+        # The extension caches secrets in a local sidecar, so this is a
+        # loopback HTTP GET instead of a Secrets Manager API round-trip
+        response = _SESSION.get(
+            SECRETS_EXTENSION_URL,
+            params={'secretId': SECRETS_ARN},
+            headers={'X-Aws-Parameters-Secrets-Token': os.environ.get('AWS_SESSION_TOKEN', '')},
+            timeout=2
+        )
+        response.raise_for_status()
+        secret_string = orjson.loads(response.content)['SecretString']
     except Exception as e:
-        print(f"Error retrieving secrets: {str(e)}")
-        return None
+        logger.warning(f"Secrets extension unavailable ({str(e)}), falling back to API call")
+
+    if secret_string is None:
+        try:
+            secret_string = secrets_client.get_secret_value(SecretId=SECRETS_ARN)['SecretString']
+        except Exception as e:
+            logger.error(f"Error retrieving secrets: {str(e)}")
+            return None
+
+    _SECRETS_CACHE = orjson.loads(secret_string)
+    return _SECRETS_CACHE
 
 
 def get_amadeus_access_token(api_key, api_secret):
-    """Get Amadeus API access token using client credentials"""
+    """Get Amadeus API access token using client credentials (cached until expiry)"""
+    # Reuse the cached token while it has at least 60s of validity left
+    if _AMADEUS_TOKEN['token'] and time.time() < _AMADEUS_TOKEN['expires_at'] - 60:
+        return _AMADEUS_TOKEN['token']
+
     try:
         headers = {
             "Content-Type": "application/x-www-form-urlencoded"
@@ -42,80 +124,93 @@ def get_amadeus_access_token(api_key, api_secret):
             "client_secret": api_secret
         }
 
-        print("Requesting Amadeus access token...")
-        response = requests.post(AMADEUS_AUTH_URL, headers=headers, data=data, timeout=30)
+        logger.info("Requesting Amadeus access token...")
+        response = _SESSION.post(AMADEUS_AUTH_URL, headers=headers, data=data, timeout=30)
         response.raise_for_status()
 
-        result = response.json()
+        result = orjson.loads(response.content)
         access_token = result.get('access_token')
         expires_in = result.get('expires_in', 1799)  # Default 30 minutes
 
-        print(f"Access token obtained, expires in {expires_in} seconds")
+        _AMADEUS_TOKEN['token'] = access_token
+        _AMADEUS_TOKEN['expires_at'] = time.time() + expires_in
+
+        logger.info(f"Access token obtained, expires in {expires_in} seconds")
         return access_token
 
     except requests.exceptions.RequestException as e:
-        print(f"Error getting Amadeus access token: {str(e)}")
+        logger.error(f"Error getting Amadeus access token: {str(e)}")
         if hasattr(e, 'response') and e.response is not None:
-            print(f"Response content: {e.response.text}")
+            logger.error(f"Response content: {e.response.text}")
         return None
     except Exception as e:
-        print(f"Unexpected error in token retrieval: {str(e)}")
+        logger.error(f"Unexpected error in token retrieval: {str(e)}")
         return None
 
 
-def check_flight_cache(departure_airport, destination_airport):
-    """Check DynamoDB cache for existing flight price"""
+def check_flight_cache(departure_airport, destination_airports):
+    """Check DynamoDB cache for existing flight prices with a single query"""
+    cached_prices = {}
     try:
         table = dynamodb.Table(TRAVEL_INDEX_TABLE)
-        cache_key = f"{departure_airport}|{destination_airport}"
+        wanted = set(destination_airports)
+        current_time = int(time.time())
+
+        # One partition per departure airport: a single Query returns every
+        # cached destination price for it, instead of one read per key, and
+        # entries no longer pile onto a single hot partition
+        kwargs = {
+            'KeyConditionExpression': Key('user_id').eq(f"flight_cache#{departure_airport}")
+        }
 
-        response = table.get_item(
-            Key={
-                'user_id': 'flight_cache',
-                'timestamp': cache_key
-            }
-        )
+        while True:
+            response = table.query(**kwargs)
 
-        if 'Item' in response:
-            item = response['Item']
-            # Check if TTL hasn't expired
-            if 'ttl' in item:
-                current_time = int(time.time())
-                if item['ttl'] > current_time:
-                    print(f"Cache hit for {cache_key}")
-                    return float(item.get('price', 0))
+            for item in response.get('Items', []):
+                destination = item['timestamp']
+                # Check if TTL hasn't expired
+                if destination in wanted and 'ttl' in item and item['ttl'] > current_time:
+                    cached_prices[destination] = float(item.get('price', 0))
 
-        print(f"Cache miss for {cache_key}")
-        return None
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        logger.info(f"Cache hits for {len(cached_prices)}/{len(destination_airports)} destinations")
+        return cached_prices
     except Exception as e:
-        print(f"Error checking flight cache: {str(e)}")
-        return None
+        logger.error(f"Error checking flight cache: {str(e)}")
+        return cached_prices
 
 
-def store_flight_cache(departure_airport, destination_airport, price):
-    """Store flight price in DynamoDB cache"""
+def store_flight_cache(departure_airport, prices):
+    """Store fetched flight prices in the DynamoDB cache with batched writes"""
+    if not prices:
+        return True
+
     try:
         table = dynamodb.Table(TRAVEL_INDEX_TABLE)
-        cache_key = f"{departure_airport}|{destination_airport}"
         ttl = int(time.time()) + (CACHE_TTL_HOURS * 60 * 60)
+        cached_at = datetime.utcnow().isoformat()
+
+        with table.batch_writer() as batch:
+            for destination_airport, price in prices.items():
+                batch.put_item(Item={
+                    'user_id': f"flight_cache#{departure_airport}",
+                    'timestamp': destination_airport,
+                    'price': Decimal(str(price)),
+                    'ttl': ttl,
+                    'cached_at': cached_at
+                })
 
-        item = {
-            'user_id': 'flight_cache',
-            'timestamp': cache_key,
-            'price': Decimal(str(price)),
-            'ttl': ttl,
-            'cached_at': datetime.utcnow().isoformat()
-        }
-
-        table.put_item(Item=item)
-        print(f"Cached flight price for {cache_key}: €{price}")
+        logger.info(f"Cached {len(prices)} flight prices for {departure_airport}")
         return True
     except Exception as e:
-        print(f"Error storing flight cache: {str(e)}")
+        logger.error(f"Error storing flight cache: {str(e)}")
         return False
 
 
-def search_flight_price(access_token, departure_airport, destination_airport):
+async def search_flight_price(access_token, departure_airport, destination_airport):
     """Search for round-trip flight price using Amadeus API"""
     try:
         # Calculate dates: departure in 7 days, return in 14 days
@@ -162,41 +257,37 @@ def search_flight_price(access_token, departure_airport, destination_airport):
             }
         }
 
-        print(f"Searching flights: {departure_airport} → {destination_airport} → {departure_airport}")
-        print(f"Dates: {departure_date} to {return_date}")
+        logger.info(f"Searching flights: {departure_airport} → {destination_airport} → {departure_airport}")
+        logger.info(f"Dates: {departure_date} to {return_date}")
 
-        response = requests.post(AMADEUS_FLIGHTS_URL, headers=headers, json=payload, timeout=60)
+        client = get_async_client()
+        response = await client.post(AMADEUS_FLIGHTS_URL, headers=headers, json=payload)
         response.raise_for_status()
 
-        result = response.json()
-
-        # Extract cheapest price from flight offers
-        if 'data' in result and len(result['data']) > 0:
-            prices = []
-            for offer in result['data']:
-                if 'price' in offer and 'total' in offer['price']:
-                    price = float(offer['price']['total'])
-                    prices.append(price)
-
-            if prices:
-                cheapest_price = min(prices)
-                print(f"Found {len(prices)} offers, cheapest: €{cheapest_price}")
-                return cheapest_price
-            else:
-                print("No valid prices found in flight offers")
-                return None
+        # Stream-extract just the offer totals instead of materializing the
+        # whole multi-offer response tree (payloads can be hundreds of KB)
+        prices = [
+            float(total)
+            for total in ijson.items(io.BytesIO(response.content), 'data.item.price.total')
+        ]
+
+        if prices:
+            cheapest_price = min(prices)
+            logger.info(f"Found {len(prices)} offers, cheapest: €{cheapest_price}")
+            return cheapest_price
         else:
-            print(f"No flight offers found. Response: {result}")
+            logger.info(f"No flight offers found for {departure_airport} → {destination_airport}")
             return None
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error searching flights: {str(e)}")
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"Response status: {e.response.status_code}")
-            print(f"Response content: {e.response.text}")
+    except httpx.HTTPError as e:
+        logger.error(f"Error searching flights: {str(e)}")
+        response = getattr(e, 'response', None)
+        if response is not None:
+            logger.error(f"Response status: {response.status_code}")
+            logger.error(f"Response content: {response.text}")
         return None
     except Exception as e:
-        print(f"Unexpected error in flight search: {str(e)}")
+        logger.error(f"Unexpected error in flight search: {str(e)}")
         return None
 
 
@@ -209,12 +300,17 @@ def handler(event, context):
         "destinations": ["BCN", "PAR", "LON", ...]
     }
     """
-    print(f"Flight pricer invoked with event: {json.dumps(event)}")
+    # Lazy %s formatting: the event is only serialized when DEBUG is enabled
+    logger.debug("Flight pricer invoked with event: %s", event)
 
     # Parse request body
     try:
-        if isinstance(event.get('body'), str):
-            body = json.loads(event['body'])
+        if event.get('gzip'):
+            # Lambda-to-Lambda callers send the body gzipped + base64
+            # encoded to cut Invoke payload bytes
+            body = orjson.loads(gzip.decompress(base64.b64decode(event['body'])))
+        elif isinstance(event.get('body'), str):
+            body = orjson.loads(event['body'])
         else:
             body = event.get('body', {})
 
@@ -228,12 +324,12 @@ def handler(event, context):
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 },
-                'body': json.dumps({
+                'body': _dumps({
                     'error': 'Missing departure_airport or destinations'
                 })
             }
 
-        print(f"Fetching flight prices from {departure_airport} to {len(destinations)} destinations")
+        logger.info(f"Fetching flight prices from {departure_airport} to {len(destinations)} destinations")
 
     except Exception as e:
         return {
@@ -242,7 +338,7 @@ def handler(event, context):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
+            'body': _dumps({
                 'error': f'Invalid request: {str(e)}'
             })
         }
@@ -256,7 +352,7 @@ def handler(event, context):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
+            'body': _dumps({
                 'error': 'Failed to retrieve Amadeus API keys'
             })
         }
@@ -274,61 +370,62 @@ def handler(event, context):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
+            'body': _dumps({
                 'error': 'Failed to get Amadeus access token'
             })
         }
 
-    # Helper function to fetch price for a single destination
-    def fetch_single_destination_price(destination_code):
-        """Fetch price for a single destination (cache or API)"""
-        destination_code = destination_code.strip().upper()
+    # Helper coroutine to fetch price for a single destination
+    async def fetch_single_destination_price(destination_code, semaphore):
+        """Fetch price for a single destination from the Amadeus API"""
+        async with semaphore:
+            price = await search_flight_price(access_token, departure_airport, destination_code)
 
-        # Check cache first
-        cached_price = check_flight_cache(departure_airport, destination_code)
+        if price is None:
+            logger.warning(f"Warning: Could not find price for {destination_code}")
 
-        if cached_price is not None:
-            return (destination_code, cached_price)
+        return (destination_code, price)
 
-        # Search for flight price
-        price = search_flight_price(access_token, departure_airport, destination_code)
+    async def fetch_all_prices(codes):
+        """Fan out all searches on the shared client, capped at 10 in flight"""
+        semaphore = asyncio.Semaphore(10)
+        return await asyncio.gather(
+            *[fetch_single_destination_price(code, semaphore) for code in codes],
+            return_exceptions=True
+        )
 
-        if price is not None:
-            # Store in cache
-            store_flight_cache(departure_airport, destination_code, price)
-            return (destination_code, price)
-        else:
-            print(f"Warning: Could not find price for {destination_code}")
-            return (destination_code, None)
+    # Coalesce duplicate destination codes (order-preserving) so each
+    # (departure, destination) pair is looked up at most once per invocation
+    destination_codes = list(dict.fromkeys(dest.strip().upper() for dest in destinations))
 
-    # Fetch prices in parallel using ThreadPoolExecutor
-    flight_prices = {}
+    # Check the cache for all destinations in one batched read
+    flight_prices = check_flight_cache(departure_airport, destination_codes)
+    cache_misses = [dest for dest in destination_codes if dest not in flight_prices]
 
-    print(f"Starting parallel price fetching for {len(destinations)} destinations...")
+    logger.info(f"Starting parallel price fetching for {len(cache_misses)} destinations...")
     start_time = time.time()
 
-    # Use ThreadPoolExecutor to make parallel API calls
-    # Max 10 workers to avoid overwhelming the API
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        # Submit all tasks
-        future_to_dest = {
-            executor.submit(fetch_single_destination_price, dest): dest
-            for dest in destinations
-        }
+    new_prices = {}
+
+    if cache_misses:
+        results = _LOOP.run_until_complete(fetch_all_prices(cache_misses))
 
-        # Collect results as they complete
-        for future in as_completed(future_to_dest):
-            try:
-                destination_code, price = future.result()
+        for dest, result in zip(cache_misses, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching price for {dest}: {str(result)}")
+                flight_prices[dest] = None
+            else:
+                destination_code, price = result
                 flight_prices[destination_code] = price
-                print(f"Completed: {destination_code} = €{price if price else 'N/A'}")
-            except Exception as e:
-                dest = future_to_dest[future]
-                print(f"Error fetching price for {dest}: {str(e)}")
-                flight_prices[dest.strip().upper()] = None
+                if price is not None:
+                    new_prices[destination_code] = price
+                logger.debug("Completed: %s = €%s", destination_code, price if price else 'N/A')
+
+        # Store freshly fetched prices in one batched write
+        store_flight_cache(departure_airport, new_prices)
 
     elapsed_time = time.time() - start_time
-    print(f"Parallel fetching completed in {elapsed_time:.2f} seconds")
+    logger.info(f"Parallel fetching completed in {elapsed_time:.2f} seconds")
 
     # Return results
     return {
@@ -337,7 +434,7 @@ def handler(event, context):
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*'
         },
-        'body': json.dumps({
+        'body': _dumps({
             'departure_airport': departure_airport,
             'flight_prices': flight_prices
         })
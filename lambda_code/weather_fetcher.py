@@ -1,32 +1,86 @@
-import json
 import os
+import orjson
 import boto3
 import requests
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from decimal import Decimal
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 dynamodb = boto3.resource('dynamodb')
 secrets_client = boto3.client('secretsmanager')
 s3_client = boto3.client('s3')
 
+
+def _dumps(obj):
+    """Serialize with orjson, decoded to str (drop-in for json.dumps)"""
+    return orjson.dumps(obj, default=float).decode()
+
+
+# Module-level executor so worker threads persist across warm invocations
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix='weather')
+
+# Shared HTTP session sized to the worker pool so every forecast fetch
+# reuses pooled TCP+TLS connections instead of handshaking per call
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.1,
+                      status_forcelist=[429, 500, 502, 503, 504])
+))
+
 DESTINATIONS_TABLE = os.environ['DESTINATIONS_TABLE']
 SECRETS_ARN = os.environ['SECRETS_ARN']
 S3_BUCKET = os.environ['S3_BUCKET']
 
+# One table handle reused across warm invocations
+TABLE = dynamodb.Table(DESTINATIONS_TABLE)
+
+# Sentinel returned when the API answers 304 Not Modified
+NOT_MODIFIED = object()
+
 
 def get_api_keys():
     """Retrieve API keys from Secrets Manager"""
     try:
         response = secrets_client.get_secret_value(SecretId=SECRETS_ARN)
-        return json.loads(response['SecretString'])
+        return orjson.loads(response['SecretString'])
     except Exception as e:
         print(f"Error retrieving secrets: {str(e)}")
         return None
 
 
-def fetch_weather_forecast(lat, lon, api_key):
+def get_cached_validators(city_ids):
+    """Fetch each city's stored ETag/Last-Modified validators from DynamoDB"""
+    validators = {}
+    try:
+        keys = [{'city_id': city_id} for city_id in city_ids]
+
+        # batch_get_item accepts at most 100 keys per request
+        for i in range(0, len(keys), 100):
+            response = dynamodb.batch_get_item(RequestItems={
+                DESTINATIONS_TABLE: {
+                    'Keys': keys[i:i + 100],
+                    'ProjectionExpression': 'city_id, weather_etag, weather_last_modified'
+                }
+            })
+            for item in response.get('Responses', {}).get(DESTINATIONS_TABLE, []):
+                validators[item['city_id']] = (item.get('weather_etag'),
+                                               item.get('weather_last_modified'))
+    except Exception as e:
+        print(f"Error fetching cached weather validators: {str(e)}")
+
+    return validators
+
+
+def fetch_weather_forecast(lat, lon, api_key, etag=None, last_modified=None):
     """
     Fetch 5-day weather forecast from OpenWeatherMap API
-    Returns forecast data in 3-hour intervals
+    Returns (forecast data in 3-hour intervals, ETag, Last-Modified).
+    Sends a conditional request when cached validators are supplied and
+    returns NOT_MODIFIED on a 304, so the caller can skip parse and write.
     """
     url = f"https://api.openweathermap.org/data/2.5/forecast"
     params = {
@@ -36,10 +90,20 @@ def fetch_weather_forecast(lat, lon, api_key):
         'units': 'metric'
     }
 
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = _SESSION.get(url, params=params, headers=headers, timeout=10)
+        if response.status_code == 304:
+            return NOT_MODIFIED
         response.raise_for_status()
-        return response.json()
+        return (response.json(),
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'))
     except requests.exceptions.RequestException as e:
         print(f"Error fetching weather forecast: {str(e)}")
         return None
@@ -62,24 +126,30 @@ def calculate_3day_average(forecast_data):
     if not three_day_forecast:
         return None
 
-    # Extract temperatures
-    temperatures = [item['main']['temp'] for item in three_day_forecast]
-
-    # Calculate statistics
-    avg_temp = sum(temperatures) / len(temperatures)
-    min_temp = min(temperatures)
-    max_temp = max(temperatures)
+    # Accumulate temperature, humidity and wind statistics in a single
+    # pass instead of building an intermediate list per metric
+    min_temp = max_temp = three_day_forecast[0]['main']['temp']
+    temp_sum = humidity_sum = wind_sum = 0.0
+
+    for item in three_day_forecast:
+        main = item['main']
+        temp = main['temp']
+        temp_sum += temp
+        if temp < min_temp:
+            min_temp = temp
+        elif temp > max_temp:
+            max_temp = temp
+        humidity_sum += main['humidity']
+        wind_sum += item['wind']['speed']
+
+    count = len(three_day_forecast)
+    avg_temp = temp_sum / count
+    avg_humidity = humidity_sum / count
+    avg_wind_speed = wind_sum / count
 
     # Get most common weather description from first day
     descriptions = [item['weather'][0]['description'] for item in three_day_forecast[:8]]  # First 24 hours
-    most_common_desc = max(set(descriptions), key=descriptions.count)
-
-    # Calculate average humidity and wind speed
-    humidities = [item['main']['humidity'] for item in three_day_forecast]
-    wind_speeds = [item['wind']['speed'] for item in three_day_forecast]
-
-    avg_humidity = sum(humidities) / len(humidities)
-    avg_wind_speed = sum(wind_speeds) / len(wind_speeds)
+    most_common_desc = Counter(descriptions).most_common(1)[0][0]
 
     return {
         'avg_temperature': round(avg_temp, 1),
@@ -96,10 +166,27 @@ def convert_to_dynamodb_format(obj):
     """Convert floats to Decimal for DynamoDB"""
     if isinstance(obj, float):
         return Decimal(str(obj))
-    elif isinstance(obj, dict):
-        return {k: convert_to_dynamodb_format(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_dynamodb_format(item) for item in obj]
+    if not isinstance(obj, (dict, list)):
+        return obj
+
+    # Walk with an explicit stack and mutate containers in place
+    # (inputs are fresh from JSON) instead of recursing and rebuilding
+    # every nested dict/list
+    stack = [obj]
+    while stack:
+        container = stack.pop()
+        if isinstance(container, dict):
+            for key, value in container.items():
+                if isinstance(value, float):
+                    container[key] = Decimal(str(value))
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+        else:
+            for i, value in enumerate(container):
+                if isinstance(value, float):
+                    container[i] = Decimal(str(value))
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
     return obj
 
 
@@ -115,7 +202,7 @@ def handler(event, context):
     if not secrets or 'openweather_api_key' not in secrets:
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': 'Failed to retrieve API keys'})
+            'body': _dumps({'error': 'Failed to retrieve API keys'})
         }
 
     api_key = secrets['openweather_api_key']
@@ -123,29 +210,57 @@ def handler(event, context):
     # Load destinations from S3
     try:
         s3_response = s3_client.get_object(Bucket=S3_BUCKET, Key='static-data/destinations.json')
-        destinations_data = json.loads(s3_response['Body'].read().decode('utf-8'))
+        destinations_data = orjson.loads(s3_response['Body'].read())
         destinations = destinations_data['destinations']
     except Exception as e:
         print(f"Error loading destinations: {str(e)}")
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': 'Failed to load destinations'})
+            'body': _dumps({'error': 'Failed to load destinations'})
         }
 
     # Fetch weather for each destination
-    table = dynamodb.Table(DESTINATIONS_TABLE)
     results = []
 
-    for destination in destinations:
+    # Validators from the previous run let each fetch be conditional; a
+    # 304 skips the JSON parse and the DynamoDB write for that city
+    validators = get_cached_validators([d['city_id'] for d in destinations])
+
+    # Each forecast fetch is an independent blocking HTTPS call, so fan
+    # them out across worker threads and process each as it completes;
+    # wall time drops from sum(RTT) to roughly max(RTT)
+    futures = {
+        _EXECUTOR.submit(
+            fetch_weather_forecast,
+            destination['coordinates']['lat'],
+            destination['coordinates']['lon'],
+            api_key,
+            *validators.get(destination['city_id'], (None, None))
+        ): destination
+        for destination in destinations
+    }
+
+    # Items queued for writing, paired with their index into results so
+    # a failed batch can be reported per city instead of failing the run
+    pending = []
+
+    for future in as_completed(futures):
+        destination = futures[future]
         city_id = destination['city_id']
         city_name = destination['city']
-        lat = destination['coordinates']['lat']
-        lon = destination['coordinates']['lon']
 
-        # Fetch 5-day forecast
-        forecast_data = fetch_weather_forecast(lat, lon, api_key)
+        result = future.result()
 
-        if forecast_data:
+        if result is NOT_MODIFIED:
+            # Forecast unchanged since last run; stored item stays
+            results.append({
+                'city': city_name,
+                'status': 'not_modified'
+            })
+            continue
+
+        if result:
+            forecast_data, etag, last_modified = result
             # Calculate 3-day average
             weather_stats = calculate_3day_average(forecast_data)
 
@@ -163,26 +278,24 @@ def handler(event, context):
                     'last_updated': context.aws_request_id
                 })
 
-                try:
-                    table.put_item(Item=item)
-                    results.append({
-                        'city': city_name,
-                        'status': 'success',
-                        'weather': {
-                            'avg_temperature': weather_stats['avg_temperature'],
-                            'min_temperature': weather_stats['min_temperature'],
-                            'max_temperature': weather_stats['max_temperature'],
-                            'description': weather_stats['description']
-                        }
-                    })
-                    print(f"Updated 3-day forecast for {city_name}: {weather_stats['avg_temperature']}°C avg")
-                except Exception as e:
-                    print(f"Error updating DynamoDB for {city_id}: {str(e)}")
-                    results.append({
-                        'city': city_name,
-                        'status': 'failed',
-                        'error': str(e)
-                    })
+                # Persist validators for next run's conditional GET
+                if etag:
+                    item['weather_etag'] = etag
+                if last_modified:
+                    item['weather_last_modified'] = last_modified
+
+                results.append({
+                    'city': city_name,
+                    'status': 'success',
+                    'weather': {
+                        'avg_temperature': weather_stats['avg_temperature'],
+                        'min_temperature': weather_stats['min_temperature'],
+                        'max_temperature': weather_stats['max_temperature'],
+                        'description': weather_stats['description']
+                    }
+                })
+                pending.append((item, len(results) - 1))
+                print(f"Queued 3-day forecast for {city_name}: {weather_stats['avg_temperature']}°C avg")
             else:
                 results.append({
                     'city': city_name,
@@ -196,13 +309,31 @@ def handler(event, context):
                 'error': 'Weather API request failed'
             })
 
+    # Coalesce the writes into BatchWriteItem requests instead of one
+    # put_item round-trip per city. Each 25-item batch gets its own
+    # writer context, so a failed flush only downgrades its own cities
+    # instead of discarding the whole run's results
+    for start in range(0, len(pending), 25):
+        chunk = pending[start:start + 25]
+        try:
+            with TABLE.batch_writer(overwrite_by_pkeys=['city_id']) as batch:
+                for item, _ in chunk:
+                    batch.put_item(Item=item)
+        except Exception as e:
+            print(f"Error writing weather batch to DynamoDB: {str(e)}")
+            for _, result_index in chunk:
+                entry = results[result_index]
+                entry['status'] = 'failed'
+                entry['error'] = 'DynamoDB write failed'
+                entry.pop('weather', None)
+
     return {
         'statusCode': 200,
         'headers': {
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*'
         },
-        'body': json.dumps({
+        'body': _dumps({
             'message': 'Weather data fetch completed',
             'results': results
         })
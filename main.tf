@@ -187,7 +187,10 @@ resource "aws_iam_role_policy" "lambda_permissions" {
           "dynamodb:UpdateItem",
           "dynamodb:Query",
           "dynamodb:Scan",
-          "dynamodb:DeleteItem"
+          "dynamodb:DeleteItem",
+          "dynamodb:BatchWriteItem",
+          "dynamodb:BatchGetItem",
+          "dynamodb:DescribeTable"
         ]
         Resource = [
           aws_dynamodb_table.destinations.arn,
@@ -343,6 +346,7 @@ resource "aws_lambda_function" "airport_resolver" {
   source_code_hash = fileexists("${path.module}/lambda_code/airport_resolver.zip") ? filebase64sha256("${path.module}/lambda_code/airport_resolver.zip") : null
   runtime         = "python3.11"
   timeout         = 60  # Longer timeout for LLM API call
+  layers          = [var.secrets_extension_layer_arn]
 
   environment {
     variables = {
@@ -400,6 +404,7 @@ resource "aws_lambda_function" "flight_pricer" {
   source_code_hash = fileexists("${path.module}/lambda_code/flight_pricer.zip") ? filebase64sha256("${path.module}/lambda_code/flight_pricer.zip") : null
   runtime         = "python3.11"
   timeout         = 60  # Longer timeout for flight API calls
+  layers          = [var.secrets_extension_layer_arn]
 
   environment {
     variables = {
@@ -455,6 +460,7 @@ resource "aws_lambda_function" "index_calculator" {
   source_code_hash = fileexists("${path.module}/lambda_code/index_calculator.zip") ? filebase64sha256("${path.module}/lambda_code/index_calculator.zip") : null
   runtime         = "python3.11"
   timeout         = 120  # Longer timeout for calculating all destinations
+  publish         = true # Versions are required for provisioned concurrency
 
   environment {
     variables = {
@@ -468,6 +474,20 @@ resource "aws_lambda_function" "index_calculator" {
   }
 }
 
+# Alias carrying provisioned concurrency so the user-facing endpoint
+# never waits on a cold start
+resource "aws_lambda_alias" "index_calculator_live" {
+  name             = "live"
+  function_name    = aws_lambda_function.index_calculator.function_name
+  function_version = aws_lambda_function.index_calculator.version
+}
+
+resource "aws_lambda_provisioned_concurrency_config" "index_calculator" {
+  function_name                     = aws_lambda_function.index_calculator.function_name
+  qualifier                         = aws_lambda_alias.index_calculator_live.name
+  provisioned_concurrent_executions = var.index_calculator_provisioned_concurrency
+}
+
 # CloudWatch Log Group for Index Calculator Lambda
 resource "aws_cloudwatch_log_group" "index_calculator" {
   name              = "/aws/lambda/${aws_lambda_function.index_calculator.function_name}"
@@ -482,7 +502,7 @@ resource "aws_cloudwatch_log_group" "index_calculator" {
 resource "aws_apigatewayv2_integration" "index_calculator" {
   api_id           = aws_apigatewayv2_api.main.id
   integration_type = "AWS_PROXY"
-  integration_uri  = aws_lambda_function.index_calculator.invoke_arn
+  integration_uri  = aws_lambda_alias.index_calculator_live.invoke_arn
 }
 
 resource "aws_apigatewayv2_route" "index_calculator" {
@@ -497,6 +517,7 @@ resource "aws_lambda_permission" "api_gateway_index_calculator" {
   statement_id  = "AllowAPIGatewayInvokeIndexCalculator"
   action        = "lambda:InvokeFunction"
   function_name = aws_lambda_function.index_calculator.function_name
+  qualifier     = aws_lambda_alias.index_calculator_live.name
   principal     = "apigateway.amazonaws.com"
   source_arn    = "${aws_apigatewayv2_api.main.execution_arn}/*/*"
 }
@@ -512,7 +533,8 @@ resource "aws_iam_role_policy" "lambda_invoke_permissions" {
       {
         Effect = "Allow"
         Action = [
-          "lambda:InvokeFunction"
+          "lambda:InvokeFunction",
+          "lambda:GetFunction"
         ]
         Resource = [
           aws_lambda_function.flight_pricer.arn
@@ -12,8 +12,8 @@ echo "Packaging weather_fetcher..."
 mkdir -p "$TEMP_DIR"
 cd lambda_code
 
-# Install dependencies to temp directory
-pip install -r requirements.txt -t "../$TEMP_DIR" --quiet
+# Install only this function's dependencies to temp directory
+pip install -r requirements-weather_fetcher.txt -t "../$TEMP_DIR" --quiet
 
 # Copy Lambda function code
 cp weather_fetcher.py "../$TEMP_DIR/index.py"
@@ -31,8 +31,8 @@ echo "Packaging airport_resolver..."
 mkdir -p "$TEMP_DIR"
 cd lambda_code
 
-# Install dependencies to temp directory (reuse same requirements.txt)
-pip install -r requirements.txt -t "../$TEMP_DIR" --quiet
+# Install only this function's dependencies to temp directory
+pip install -r requirements-airport_resolver.txt -t "../$TEMP_DIR" --quiet
 
 # Copy Lambda function code
 cp airport_resolver.py "../$TEMP_DIR/index.py"
@@ -40,6 +40,10 @@ cp airport_resolver.py "../$TEMP_DIR/index.py"
 # Copy airports data file (required by airport_resolver)
 cp airports_data.json "../$TEMP_DIR/airports_data.json"
 
+# Pre-parse the airport dataset so the Lambda skips the JSON parse at cold start
+python3 build_airports_npz.py
+cp airports.npz "../$TEMP_DIR/airports.npz"
+
 # Create zip file
 cd "../$TEMP_DIR"
 zip -r ../lambda_code/airport_resolver.zip . > /dev/null
@@ -53,8 +57,8 @@ echo "Packaging flight_pricer..."
 mkdir -p "$TEMP_DIR"
 cd lambda_code
 
-# Install dependencies to temp directory (reuse same requirements.txt)
-pip install -r requirements.txt -t "../$TEMP_DIR" --quiet
+# Install only this function's dependencies to temp directory
+pip install -r requirements-flight_pricer.txt -t "../$TEMP_DIR" --quiet
 
 # Copy Lambda function code
 cp flight_pricer.py "../$TEMP_DIR/index.py"
@@ -72,8 +76,8 @@ echo "Packaging index_calculator..."
 mkdir -p "$TEMP_DIR"
 cd lambda_code
 
-# Install dependencies to temp directory (reuse same requirements.txt)
-pip install -r requirements.txt -t "../$TEMP_DIR" --quiet
+# Install only this function's dependencies to temp directory
+pip install -r requirements-index_calculator.txt -t "../$TEMP_DIR" --quiet
 
 # Copy Lambda function code
 cp index_calculator.py "../$TEMP_DIR/index.py"
@@ -51,3 +51,15 @@ variable "openrouter_api_key" {
   default     = "placeholder-will-update-later"
   sensitive   = true
 }
+
+variable "index_calculator_provisioned_concurrency" {
+  description = "Provisioned concurrency for the user-facing index calculator"
+  type        = number
+  default     = 2
+}
+
+variable "secrets_extension_layer_arn" {
+  description = "AWS Parameters and Secrets Lambda Extension layer (region-specific ARN)"
+  type        = string
+  default     = "arn:aws:lambda:eu-west-1:015030872274:layer:AWS-Parameters-and-Secrets-Lambda-Extension:11"
+}